@@ -6,13 +6,21 @@ Updated for OpenAI GPT-5 + Responses API
 
 from __future__ import annotations
 
-import argparse, datetime as dt, json, os, pathlib, re, textwrap, warnings, time
-from typing import List, Dict, Tuple
+import argparse, datetime as dt, functools, hashlib, json, os, pathlib, re, shutil, textwrap, threading, warnings, time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Dict, Iterator, TYPE_CHECKING
 
 import numpy as np
 import arxiv
 from openai import OpenAI
-from sentence_transformers import SentenceTransformer
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib writer
+    orjson = None
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # ── CONSTANTS ────────────────────────────────────────────────────────────
 MAX_RESULTS       = 222
@@ -22,7 +30,8 @@ USD_PER_TOKEN     = 0.000005
 
 DEFAULT_DATE_LAG_DAYS = 5
 
-EMBED_MODEL_NAME = "intfloat/e5-large-v2"
+EMBED_MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_QINT8_FILE  = "onnx/model_qint8_avx512_vnni.onnx"
 CONCEPTS = [
     "machine translation", "translation",
     "neural machine translation",
@@ -36,37 +45,166 @@ CONCEPTS = [
 BASE_DIR = pathlib.Path(__file__).parent
 LOG_DIR  = BASE_DIR / "logs"
 LOG_DIR.mkdir(exist_ok=True)
+MODEL_DIR = BASE_DIR / "models"
+EMBED_CACHE = BASE_DIR / "embed_cache.npz"
+CONCEPT_CACHE = BASE_DIR / "concept_vec.npz"
+
+_WS = re.compile(r"\s+")
 
 # ── MODEL SET-UP ─────────────────────────────────────────────────────────
 warnings.filterwarnings("ignore", message=r".*deprecated.*", category=DeprecationWarning)
-EMBEDDER = SentenceTransformer(EMBED_MODEL_NAME)
-CONCEPT_VECTOR = EMBEDDER.encode(" ; ".join(CONCEPTS), normalize_embeddings=True)
+
+CPU_THREADS = os.cpu_count() or 4
+
+
+@functools.lru_cache(maxsize=None)
+def embed_backend() -> str:
+    """Which build load_embedder() picks; part of both cache keys."""
+    import torch
+
+    if torch.cuda.is_available():
+        return "cuda-fp16"
+    if torch.backends.mps.is_available():
+        return "mps"
+    return ONNX_QINT8_FILE
+
+
+def load_embedder() -> SentenceTransformer:
+    """fp16 on CUDA, MPS on Apple, else the cached int8 ONNX build."""
+    # heavy imports deferred to the loader thread
+    import onnxruntime as ort
+    import torch
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    # use every core on CI runners
+    torch.set_num_threads(CPU_THREADS)
+    torch.set_num_interop_threads(1)
+
+    backend = embed_backend()
+    if backend == "cuda-fp16":
+        return SentenceTransformer(EMBED_MODEL_NAME, device="cuda").half()
+    if backend == "mps":
+        return SentenceTransformer(EMBED_MODEL_NAME, device="mps")
+
+    local = MODEL_DIR / EMBED_MODEL_NAME.replace("/", "__")
+    if not (local / ONNX_QINT8_FILE).exists():
+        print(f"[info] exporting int8 ONNX embedder to {local.relative_to(BASE_DIR)}...")
+        # export then rename, so a killed daemon never leaves a half-built model
+        tmp = local.with_name(local.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        model = SentenceTransformer(EMBED_MODEL_NAME, backend="onnx")
+        model.save(str(tmp))
+        export_dynamic_quantized_onnx_model(model, "avx512_vnni", str(tmp))
+        shutil.rmtree(local, ignore_errors=True)
+        tmp.rename(local)
+
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = CPU_THREADS
+    opts.inter_op_num_threads = 1
+    print(f"[info] CPU inference: {opts.intra_op_num_threads} ORT / "
+          f"{torch.get_num_threads()} torch threads")
+    return SentenceTransformer(
+        str(local), backend="onnx",
+        model_kwargs={"file_name": ONNX_QINT8_FILE, "session_options": opts},
+    )
+
+
+def load_concept_vector(backend: str,
+                        get_embedder: Callable[[], SentenceTransformer]) -> np.ndarray:
+    """Mean-pooled unit CONCEPTS vector, cached in CONCEPT_CACHE."""
+    key = hashlib.sha256(
+        "\n".join([EMBED_MODEL_NAME, backend, "mean-pool", *CONCEPTS]).encode()
+    ).hexdigest()
+    if CONCEPT_CACHE.exists():
+        with np.load(CONCEPT_CACHE) as z:
+            if str(z["key"]) == key:
+                return z["vec"].astype(np.float32, copy=False)
+    # float32 even from the fp16 CUDA model
+    concept_vecs = get_embedder().encode(
+        CONCEPTS, batch_size=32, normalize_embeddings=True, convert_to_numpy=True
+    ).astype(np.float32, copy=False)
+    concept_vector = concept_vecs.mean(axis=0)
+    concept_vector /= np.linalg.norm(concept_vector)
+    np.savez(CONCEPT_CACHE, key=key, vec=concept_vector)
+    return concept_vector
+
+
+class Background:
+    """fn() on a daemon thread; result() waits and re-raises."""
+
+    def __init__(self, fn: Callable[[], Any]):
+        self._done = threading.Event()
+        self._value: Any = None
+        self._error: BaseException | None = None
+        threading.Thread(target=self._run, args=(fn,), daemon=True).start()
+
+    def _run(self, fn: Callable[[], Any]):
+        try:
+            self._value = fn()
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+
+    def result(self) -> Any:
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._value
 
 # ── OPENAI CLIENT ────────────────────────────────────────────────────────
 client = OpenAI()
 
 # ── HELPERS ──────────────────────────────────────────────────────────────
-def fetch_cscl(date: dt.date, max_retries: int = 3, backoff_sec: int = 20) -> List[Dict]:
-    day = date.strftime("%Y%m%d")
-    q = f'cat:cs.CL AND submittedDate:[{day}0000 TO {day}2359]'
+@dataclass(slots=True)
+class Paper:
+    id: str
+    title: str
+    abstract: str
+    url: str
+
+
+def fetch_cscl(start: dt.date, end: dt.date | None = None,
+               max_retries: int = 3, backoff_sec: int = 20) -> Dict[dt.date, List[Paper]]:
+    """cs.CL papers for start..end (inclusive), grouped by day."""
+    end = end or start
+    n_days = (end - start).days + 1
+    q = f'cat:cs.CL AND submittedDate:[{start:%Y%m%d}0000 TO {end:%Y%m%d}2359]'
     search  = arxiv.Search(
         query=q,
-        max_results=MAX_RESULTS,
+        max_results=MAX_RESULTS * n_days,
         sort_by=arxiv.SortCriterion.SubmittedDate,
     )
     client_arxiv  = arxiv.Client()
     attempt = 1
     while True:
         try:
-            papers: List[Dict] = []
-            for p in client_arxiv.results(search):
-                papers.append({
-                    "id": p.get_short_id(),
-                    "title": p.title.strip().replace("\n", " "),
-                    "abstract": re.sub(r"\s+", " ", p.summary.strip()),
-                    "url": p.pdf_url,
-                })
-            return papers
+            papers = [
+                (p.published.date(), Paper(
+                    id=p.get_short_id(),
+                    title=p.title.strip().replace("\n", " "),
+                    abstract=_WS.sub(" ", p.summary.strip()),
+                    url=p.pdf_url,
+                ))
+                for p in client_arxiv.results(search)
+            ]
+            if n_days == 1:
+                return {start: [paper for _, paper in papers]} if papers else {}
+
+            if len(papers) >= search.max_results:
+                print(f"[warn] arxiv returned the {search.max_results}-paper cap; "
+                      f"the earliest days of {start}..{end} may be incomplete")
+            by_day: Dict[dt.date, List[Paper]] = {}
+            outside = 0
+            for day, paper in papers:
+                if not start <= day <= end:
+                    outside += 1
+                    day = min(max(day, start), end)
+                by_day.setdefault(day, []).append(paper)
+            if outside:
+                print(f"[warn] {outside} paper(s) stamped outside {start}..{end}; "
+                      f"filed under the nearest edge day")
+            return {day: day_papers[:MAX_RESULTS] for day, day_papers in by_day.items()}
         except arxiv.HTTPError as e:
             print(f"[warn] arxiv HTTPError on attempt {attempt}/{max_retries}: {e}")
             if attempt >= max_retries:
@@ -77,15 +215,57 @@ def fetch_cscl(date: dt.date, max_retries: int = 3, backoff_sec: int = 20) -> Li
             attempt += 1
 
 
-def rank_mt_papers(papers: List[Dict], max_picks: int) -> List[int]:
-    scores: List[Tuple[float, int]] = []
-    for idx, p in enumerate(papers, start=1):
-        vec = EMBEDDER.encode(
-            f"{p['title']} {p['abstract']}", normalize_embeddings=True
+def _embed_cache_key(backend: str) -> str:
+    return f"{EMBED_MODEL_NAME}|{backend}"
+
+
+def load_embed_cache(backend: str) -> Dict[str, np.ndarray]:
+    """{arxiv id: fp16 vector}; empty if missing or built by another model."""
+    if not EMBED_CACHE.exists():
+        return {}
+    with np.load(EMBED_CACHE) as z:
+        if "key" not in z or str(z["key"]) != _embed_cache_key(backend):
+            return {}
+        return dict(zip(z["ids"].tolist(), z["vecs"]))
+
+
+def save_embed_cache(cache: Dict[str, np.ndarray], backend: str):
+    if not cache:
+        return
+    ids = list(cache)
+    np.savez_compressed(
+        EMBED_CACHE,
+        key=_embed_cache_key(backend),
+        ids=np.array(ids),
+        vecs=np.stack([cache[i] for i in ids]),
+    )
+
+
+def rank_mt_papers(papers: List[Paper], max_picks: int, cache: Dict[str, np.ndarray],
+                   get_embedder: Callable[[], SentenceTransformer],
+                   concept_vector: np.ndarray) -> List[int]:
+    """1-based indices of the top picks; misses are embedded into `cache`."""
+    miss = [p for p in papers if p.id not in cache]
+    if miss:
+        # one batched pass; encode() length-sorts internally
+        fresh = get_embedder().encode(
+            [f"{p.title} {p.abstract}" for p in miss],
+            batch_size=32,
+            normalize_embeddings=False,
+            convert_to_numpy=True,
+            show_progress_bar=False,
         )
-        scores.append((float(np.dot(CONCEPT_VECTOR, vec)), idx))
-    ranked = sorted(scores, reverse=True)[:max_picks]
-    return [idx for _, idx in ranked]
+        # fp16 like the cached entries
+        cache.update(zip((p.id for p in miss), fresh.astype(np.float16)))
+    vecs = np.stack([cache[p.id] for p in papers]).astype(np.float32, copy=False)
+    # cosine vs. the unit concept vector
+    scores = (vecs @ concept_vector) / np.sqrt(np.einsum("ij,ij->i", vecs, vecs))
+    k = min(max_picks, len(scores))
+    if k <= 0:
+        return []
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return (top + 1).tolist()
 
 
 def openai_chat(model: str, system: str, user: str, temperature: float = 0):
@@ -109,9 +289,9 @@ def openai_chat(model: str, system: str, user: str, temperature: float = 0):
     return text.strip(), usage
 
 # ── PREFACE ──────────────────────────────────────────────────────────────
-def draft_preface(date: dt.date, papers: List[Dict], picks: List[int]):
+def draft_preface(date: dt.date, papers: List[Paper], picks: List[int]):
     chosen = [papers[i-1] for i in picks] if picks else []
-    titles_block = "\n".join(f"• {p['title']}" for p in chosen) or "(no MT-specific papers today)"
+    titles_block = "\n".join(f"• {p.title}" for p in chosen) or "(no MT-specific papers today)"
 
     user_msg = textwrap.dedent(f"""
         You are writing the short introduction for a daily Machine Translation (MT) research digest.
@@ -137,79 +317,67 @@ def draft_preface(date: dt.date, papers: List[Dict], picks: List[int]):
     return reply, user_msg, usage
 
 # ── OUTPUT ───────────────────────────────────────────────────────────────
-def write_md(date: dt.date, preface: str,
-             papers: List[Dict], picks: List[int]):
+def _emit(preface: str, papers: List[Paper], picks: List[int]) -> Iterator[str]:
+    yield preface.strip()
+    yield ""
+    yield "---"
+    yield ""
 
-    md: List[str] = [
-        preface.strip(),
-        "",
-        "---",
-        "",
-    ]
-
-    first = True
-    for idx in picks:
-        if not first:
-            md += ["---", ""]
-        first = False
+    for n, idx in enumerate(picks):
+        if n:
+            yield "---"
+            yield ""
 
         p = papers[idx - 1]
-        md += [
-            f"## [{p['title']}]({p['url']})",
-            "",
-            p["abstract"],
-            "",
-        ]
+        yield f"## [{p.title}]({p.url})"
+        yield ""
+        yield p.abstract
+        yield ""
+
 
+def write_md(date: dt.date, preface: str,
+             papers: List[Paper], picks: List[int]):
     path = BASE_DIR / f"mt_digest_{date.isoformat()}.md"
-    path.write_text("\n".join(md), encoding="utf-8")
+    path.write_text("\n".join(_emit(preface, papers, picks)), encoding="utf-8")
     return path
 
 
 def write_log(date: dt.date, log: Dict):
     path = LOG_DIR / f"mt_digest_{date.isoformat()}.log"
-    path.write_text(json.dumps(log, indent=2, ensure_ascii=False), encoding="utf-8")
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(log, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        path.write_text(json.dumps(log, indent=2, ensure_ascii=False), encoding="utf-8")
     return path
 
 # ── MAIN ─────────────────────────────────────────────────────────────────
-def resolve_target_date(cli_pos, cli_flag, env_var):
+def resolve_target_date(cli_pos, cli_flag, env_var, today: dt.date):
     if cli_pos:
         return dt.datetime.strptime(cli_pos, "%Y-%m-%d").date()
     if cli_flag:
         return cli_flag
     if env_var:
         return dt.datetime.strptime(env_var, "%Y-%m-%d").date()
-    return dt.date.today() - dt.timedelta(days=DEFAULT_DATE_LAG_DAYS)
-
-
-def main():
-    if "OPENAI_API_KEY" not in os.environ:
-        raise SystemExit("OPENAI_API_KEY env var missing")
-
-    ap = argparse.ArgumentParser(description="Generate daily MT-centric arXiv digest.")
-    ap.add_argument("date", nargs="?", help="Target UTC date YYYY-MM-DD")
-    ap.add_argument("--date", dest="date_flag",
-                    type=lambda s: dt.datetime.strptime(s, "%Y-%m-%d").date())
-    ap.add_argument("--max", dest="max_picks", type=int,
-                    default=DEFAULT_MAX_PICKS)
-
-    ns = ap.parse_args()
-
-    target_date = resolve_target_date(ns.date, ns.date_flag, os.getenv("DATE"))
+    return today - dt.timedelta(days=DEFAULT_DATE_LAG_DAYS)
 
-    papers = fetch_cscl(target_date)
-    if not papers:
-        print("No cs.CL papers on that date.")
-        return
 
-    picks = rank_mt_papers(papers, ns.max_picks)
+def build_digest(date: dt.date, papers: List[Paper], max_picks: int,
+                 cache: Dict[str, np.ndarray],
+                 get_embedder: Callable[[], SentenceTransformer],
+                 concept_vector: np.ndarray, now_utc: dt.datetime):
+    picks = rank_mt_papers(papers, max_picks, cache, get_embedder, concept_vector)
 
-    preface, preface_prompt, preface_usage = draft_preface(target_date, papers, picks)
-    md_path = write_md(target_date, preface, papers, picks)
+    if picks:
+        preface, preface_prompt, preface_usage = draft_preface(date, papers, picks)
+    else:
+        # nothing to introduce – skip the LLM call
+        preface, preface_prompt = "No MT-specific papers today.", ""
+        preface_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    md_path = write_md(date, preface, papers, picks)
 
     log_dict = {
-        "timestamp_utc": dt.datetime.utcnow().isoformat(timespec="seconds") + "Z",
-        "target_date": target_date.isoformat(),
+        "timestamp_utc": now_utc.isoformat(timespec="seconds").replace("+00:00", "Z"),
+        "target_date": date.isoformat(),
         "total_papers": len(papers),
         "picked_indices": picks,
         "token_usage": {
@@ -222,10 +390,61 @@ def main():
         "preface_prompt_sent": preface_prompt,
     }
 
-    log_path = write_log(target_date, log_dict)
+    log_path = write_log(date, log_dict)
 
     print(f"✓ Digest → {md_path.name} | Log → {log_path.relative_to(BASE_DIR)}")
 
 
+def main():
+    now_utc = dt.datetime.now(dt.timezone.utc)
+
+    if "OPENAI_API_KEY" not in os.environ:
+        raise SystemExit("OPENAI_API_KEY env var missing")
+
+    ap = argparse.ArgumentParser(description="Generate daily MT-centric arXiv digest.")
+    ap.add_argument("date", nargs="?", help="Target UTC date YYYY-MM-DD")
+    ap.add_argument("--date", dest="date_flag",
+                    type=lambda s: dt.datetime.strptime(s, "%Y-%m-%d").date())
+    ap.add_argument("--until", dest="until",
+                    type=lambda s: dt.datetime.strptime(s, "%Y-%m-%d").date(),
+                    help="Backfill: one digest per day from the target date to this "
+                         "UTC date (inclusive), fetched in a single arXiv query")
+    ap.add_argument("--max", dest="max_picks", type=int,
+                    default=DEFAULT_MAX_PICKS)
+
+    ns = ap.parse_args()
+
+    target_date = resolve_target_date(ns.date, ns.date_flag, os.getenv("DATE"),
+                                      now_utc.date())
+    end_date = ns.until or target_date
+    if end_date < target_date:
+        ap.error("--until must not be before the target date")
+
+    # load the embedder while arXiv is queried
+    backend = Background(embed_backend)
+    embedder = Background(load_embedder)
+
+    by_day = fetch_cscl(target_date, end_date)
+    if not by_day:
+        print("No cs.CL papers on that date.")
+        return
+
+    # keep only this fetch's ids
+    fetched = {p.id for papers in by_day.values() for p in papers}
+    cache = {i: v for i, v in load_embed_cache(backend.result()).items() if i in fetched}
+
+    concept_vector = load_concept_vector(backend.result(), embedder.result)
+    for n in range((end_date - target_date).days + 1):
+        date = target_date + dt.timedelta(days=n)
+        papers = by_day.get(date)
+        if not papers:
+            print(f"No cs.CL papers on {date.isoformat()}.")
+            continue
+        build_digest(date, papers, ns.max_picks, cache,
+                     embedder.result, concept_vector, now_utc)
+
+    save_embed_cache(cache, backend.result())
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -23,6 +23,7 @@ import pathlib
 import sys
 import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any, Dict
 
@@ -30,6 +31,8 @@ import requests
 
 BTN_API = "https://api.buttondown.email/v1"
 TIMEOUT  = 30  # seconds for all HTTP calls
+SESSION  = requests.Session()  # one pooled TLS connection for every call
+LOOKUP   = requests.Session()  # separate: used from the lookup thread only
 
 
 # ── helpers ─────────────────────────────────────────────────────────────
@@ -39,9 +42,9 @@ def bail(msg: str) -> None:
     sys.exit(1)
 
 
-def request_json(method: str, url: str, **kwargs):
-    """requests.request wrapper that always returns resp & resp.json()."""
-    resp = requests.request(method, url, timeout=TIMEOUT, **kwargs)
+def request_json(method: str, url: str, session: requests.Session = SESSION, **kwargs):
+    """session.request wrapper that always returns resp & resp.json()."""
+    resp = session.request(method, url, timeout=TIMEOUT, **kwargs)
     try:
         data = resp.json()
     except Exception:
@@ -73,6 +76,8 @@ HEADERS: Dict[str, str] = {
     "Authorization": f"Token {TOKEN}",
     "Content-Type": "application/json",
 }
+SESSION.headers.update(HEADERS)
+LOOKUP.headers.update(HEADERS)
 
 # ── 1⃣ Try to create‑and‑send in one go ────────────────────────────────
 print("⏳ Creating + queuing e‑mail…")
@@ -85,8 +90,16 @@ payload: Dict[str, Any] = {
     "status": "about_to_send",        # <- queues for delivery instantly
 }
 
+# speculative duplicate lookup on its own session; read only on email_duplicate
+q = urllib.parse.quote_plus(subject)
+pool = ThreadPoolExecutor(max_workers=1)
+lookup = pool.submit(
+    request_json, "GET", f"{BTN_API}/emails?search={q}", session=LOOKUP
+)
+pool.shutdown(wait=False)
+
 create_resp, create_data = request_json(
-    "POST", f"{BTN_API}/emails", headers=HEADERS, data=json.dumps(payload)
+    "POST", f"{BTN_API}/emails", data=json.dumps(payload)
 )
 
 if create_resp.ok:
@@ -99,10 +112,7 @@ if create_data.get("code") != "email_duplicate":
 
 # ── 2⃣ Duplicate: fetch existing record and ensure it is sending ───────
 print("ℹ️  Duplicate detected – retrieving existing email…")
-q = urllib.parse.quote_plus(subject)
-list_resp, list_data = request_json(
-    "GET", f"{BTN_API}/emails?search={q}", headers=HEADERS
-)
+list_resp, list_data = lookup.result()
 list_resp.raise_for_status()
 
 try:
@@ -121,7 +131,7 @@ if state in {"about_to_send", "in_flight", "sent"}:
 # state is still draft ⇒ patch it
 print("⏳ Finalising draft → about_to_send…")
 patch_resp, patch_data = request_json(
-    "PATCH", f"{BTN_API}/emails/{email_id}", headers=HEADERS,
+    "PATCH", f"{BTN_API}/emails/{email_id}",
     data=json.dumps({"status": "about_to_send"})
 )
 